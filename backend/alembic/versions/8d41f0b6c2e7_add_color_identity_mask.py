@@ -0,0 +1,33 @@
+"""add color identity mask
+
+Revision ID: 8d41f0b6c2e7
+Revises: 
+Create Date: 2026-10-15 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0b6c2e7'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE scryfall_cards ADD COLUMN IF NOT EXISTS color_identity_mask SMALLINT NOT NULL DEFAULT 0")
+    # Backfill WUBRG bits (W=1, U=2, B=4, R=8, G=16) from the color_identity array
+    op.execute("""
+        UPDATE scryfall_cards SET color_identity_mask =
+            (CASE WHEN 'W' = ANY(color_identity) THEN 1 ELSE 0 END) |
+            (CASE WHEN 'U' = ANY(color_identity) THEN 2 ELSE 0 END) |
+            (CASE WHEN 'B' = ANY(color_identity) THEN 4 ELSE 0 END) |
+            (CASE WHEN 'R' = ANY(color_identity) THEN 8 ELSE 0 END) |
+            (CASE WHEN 'G' = ANY(color_identity) THEN 16 ELSE 0 END)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('scryfall_cards', 'color_identity_mask')
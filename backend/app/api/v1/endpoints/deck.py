@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 import os
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.schemas.deck import (
     ParseDeckRequest, ParsedDeck,
     RecommendRequest, RecommendationsResponse
@@ -66,7 +67,7 @@ def dump_response_to_json(response_data: dict, endpoint: str):
 @router.post("/parse", response_model=ParsedDeck)
 async def parse_deck(
     request: ParseDeckRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Parse a decklist and return normalized deck information"""
     try:
@@ -36,6 +36,9 @@ class Settings(BaseSettings):
         str(Path(__file__).parent.parent.parent / "data" / "processed" / "similarity_model.pkl")
     )
 
+    # Scryfall import: maintenance_work_mem for the index builds (e.g. "1GB"); unset keeps the server's
+    IMPORT_MAINTENANCE_WORK_MEM: Optional[str] = os.getenv("IMPORT_MAINTENANCE_WORK_MEM")
+
     class Config:
         case_sensitive = True
 
@@ -1,4 +1,8 @@
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -18,4 +22,40 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# libpq connection options (valid in DATABASE_URL for psycopg2) that asyncpg
+# does not accept as keywords; sslmode, connect_timeout and application_name
+# are translated, the rest only apply to libpq
+_LIBPQ_ONLY_OPTIONS = (
+    "sslmode", "connect_timeout", "application_name", "sslcert", "sslkey", "sslrootcert",
+    "sslcrl", "options", "keepalives", "keepalives_idle", "keepalives_interval",
+    "keepalives_count", "gssencmode", "channel_binding", "client_encoding", "passfile",
+)
+
+def _async_database_url(database_url: str) -> Tuple[URL, Dict[str, Any]]:
+    """asyncpg URL and connect args for a libpq-style DATABASE_URL"""
+    url = make_url(database_url)
+    query = url.query
+    connect_args: Dict[str, Any] = {}
+    if "sslmode" in query:
+        connect_args["ssl"] = query["sslmode"]
+    if "connect_timeout" in query:
+        connect_args["timeout"] = float(query["connect_timeout"])
+    if "application_name" in query:
+        connect_args["server_settings"] = {"application_name": query["application_name"]}
+    url = url.difference_update_query(_LIBPQ_ONLY_OPTIONS).set(drivername="postgresql+asyncpg")
+    return url, connect_args
+
+@lru_cache(maxsize=1)
+def _async_sessionmaker() -> async_sessionmaker:
+    """Async engine on the same database, created on first use so importing
+    this module (e.g. for Base in the import scripts) does not need asyncpg"""
+    url, connect_args = _async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(url, pool_pre_ping=True, connect_args=connect_args)
+    return async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with _async_sessionmaker()() as db:
+        yield db
@@ -1,8 +1,24 @@
-from sqlalchemy import Column, String, Integer, Date, Text, ARRAY, JSON, Numeric
+from sqlalchemy import Column, String, Integer, SmallInteger, Date, Text, ARRAY, JSON, Numeric
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+from functools import cached_property
+from typing import Iterable, Set
 from app.core.database import Base
 
+# Bit assigned to each color in a card's color identity (WUBRG order)
+COLOR_IDENTITY_BITS = {"W": 1, "U": 2, "B": 4, "R": 8, "G": 16}
+
+def color_identity_to_mask(colors: Iterable[str]) -> int:
+    """Encode a color identity list as a WUBRG bitmask"""
+    mask = 0
+    for color in colors or ():
+        mask |= COLOR_IDENTITY_BITS.get(color, 0)
+    return mask
+
+def mask_to_color_identity(mask: int) -> Set[str]:
+    """Decode a WUBRG bitmask back into a set of color letters"""
+    return {color for color, bit in COLOR_IDENTITY_BITS.items() if mask & bit}
+
 class ScryfallCard(Base):
     __tablename__ = "scryfall_cards"
 
@@ -19,6 +35,7 @@ class ScryfallCard(Base):
     oracle_text = Column(Text)
     colors = Column(ARRAY(Text))
     color_identity = Column(ARRAY(Text), nullable=False)
+    color_identity_mask = Column(SmallInteger, nullable=False, server_default="0")  # WUBRG bits of color_identity
     keywords = Column(ARRAY(Text))
     legalities = Column(JSON, nullable=False)
     image_uris = Column(JSON)
@@ -27,8 +44,9 @@ class ScryfallCard(Base):
     edhrec_rank = Column(Integer)
     data = Column(JSON, nullable=False)  # Full Scryfall Card object
 
+    @cached_property
     def is_commander(self) -> bool:
-        """Check if this card can be a commander"""
+        """Check if this card can be a commander (computed once per instance)"""
         type_line = (self.type_line or "").lower()
         oracle_text = (self.oracle_text or "").lower()
 
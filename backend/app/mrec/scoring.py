@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import heapq
 import math
 from collections import defaultdict
 from dataclasses import dataclass
@@ -86,8 +87,22 @@ class CandidateScorer:
                 if card.roles:
                     shape_roles[oracle_id] = tuple(sorted(card.roles))
 
+        # Rank on the bare totals first so evidence and CandidateScore objects are
+        # only built for candidates that survive the max_candidates cut.
+        totals = {
+            oracle_id: self._weighted_total(components)
+            for oracle_id, components in candidate_components.items()
+        }
+        if self.config.max_candidates > 0:
+            # Partial selection: O(n log k) instead of sorting every candidate
+            selected = heapq.nsmallest(
+                self.config.max_candidates, totals, key=lambda oracle_id: (-totals[oracle_id], oracle_id)
+            )
+        else:
+            selected = sorted(totals, key=lambda oracle_id: (-totals[oracle_id], oracle_id))
+
         scored: list[CandidateScore] = []
-        for oracle_id, components in candidate_components.items():
+        for oracle_id in selected:
             evidence: dict[str, Tuple[str, ...]] = {}
             if similarity_sources.get(oracle_id):
                 top_sources = sorted(
@@ -102,13 +117,19 @@ class CandidateScorer:
                 evidence['commander'] = tuple(ordered)
             if oracle_id in shape_roles:
                 evidence['shape'] = shape_roles[oracle_id]
-            scored.append(self._combine_components(oracle_id, components, evidence))
-
-        scored.sort(key=lambda item: (-item.total, item.oracle_id))
-        if self.config.max_candidates > 0:
-            scored = scored[: self.config.max_candidates]
+            scored.append(self._combine_components(oracle_id, candidate_components[oracle_id], evidence))
         return scored
 
+    def _weighted_total(self, components: Mapping[str, float]) -> float:
+        """Internal helper to blend component scores with the configured weights."""
+
+        return (
+            components.get('similarity', 0.0) * self.config.similarity_weight
+            + components.get('commander', 0.0) * self.config.commander_prior_weight
+            + components.get('frequency', 0.0) * self.config.frequency_prior_weight
+            + components.get('shape', 0.0) * self.config.shape_weight
+        )
+
     def _combine_components(
         self,
         oracle_id: str,
@@ -117,15 +138,9 @@ class CandidateScorer:
     ) -> CandidateScore:
         """Internal helper to package component scores into a dataclass."""
 
-        weighted_total = (
-            components.get('similarity', 0.0) * self.config.similarity_weight
-            + components.get('commander', 0.0) * self.config.commander_prior_weight
-            + components.get('frequency', 0.0) * self.config.frequency_prior_weight
-            + components.get('shape', 0.0) * self.config.shape_weight
-        )
         return CandidateScore(
             oracle_id=oracle_id,
-            total=weighted_total,
+            total=self._weighted_total(components),
             by_component=dict(components),
             evidence=dict(evidence),
         )
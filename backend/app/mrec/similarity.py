@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import heapq
 import math
 import pickle
 from collections import defaultdict
@@ -183,10 +184,9 @@ class CardSimilarityModel:
 
     def _top_k(self, scores: Iterable[tuple[str, float]]) -> list[tuple[str, float]]:
         k = self.config.top_k
-        sorted_scores = sorted(scores, key=lambda item: (-item[1], item[0]))
         if k <= 0:
-            return sorted_scores
-        return sorted_scores[:k]
+            return sorted(scores, key=lambda item: (-item[1], item[0]))
+        return heapq.nsmallest(k, scores, key=lambda item: (-item[1], item[0]))
 
 
     def save(self, path: str | Path) -> None:
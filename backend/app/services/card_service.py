@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, text
-from typing import Optional, List
+from typing import Optional, List, Dict
 from app.models.card import ScryfallCard
 from app.schemas.card import CardSearchResponse
 import json
@@ -86,6 +86,29 @@ class CardService:
             return card.data
         return None
 
+    async def get_cards_by_oracle_ids(self, oracle_ids: List[str]) -> Dict[str, dict]:
+        """Get one card per Oracle ID in a single query, keyed by Oracle ID
+
+        Each Oracle ID resolves to its most recent printing (ties broken by card ID),
+        so repeated requests return the same card.
+        """
+        if not oracle_ids:
+            return {}
+
+        # DISTINCT ON keeps the first row of each Oracle ID in ORDER BY order
+        cards = self.db.query(ScryfallCard).distinct(ScryfallCard.oracle_id).filter(
+            ScryfallCard.oracle_id.in_(set(oracle_ids))
+        ).order_by(
+            ScryfallCard.oracle_id, ScryfallCard.released_at.desc().nulls_last(), ScryfallCard.id
+        ).all()
+        found = {str(card.oracle_id): card.data for card in cards}
+
+        return {
+            oracle_id: found[str(oracle_id)]
+            for oracle_id in oracle_ids
+            if str(oracle_id) in found
+        }
+
     async def find_card_by_name(self, name: str) -> Optional[ScryfallCard]:
         """Find a card by its name (case insensitive)"""
         return self.db.query(ScryfallCard).filter(
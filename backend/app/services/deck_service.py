@@ -1,15 +1,43 @@
-import re
-from sqlalchemy.orm import Session
+import string
+from functools import reduce
+from operator import or_
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Tuple, Set, Optional
-from app.models.card import ScryfallCard as ScryfallCardModel
+from app.models.card import ScryfallCard as ScryfallCardModel, mask_to_color_identity
 from app.schemas.deck import ParsedDeck, DeckIssue, ParsedCard, DecklistCard
 from app.schemas.card import ScryfallCard
-from app.services.card_service import CardService
+
+# Decklist line formats, parsed by _extract_card_info without a regex:
+#   "1 Cryptic Command (PLST) IMA-48 *F*" - quantity, name, set and collector number
+#   "1x Sol Ring"                         - quantity and name, no set info
+#   "Command Tower"                       - just the card name (quantity = 1)
+_COLLECTOR_NUMBER_CHARS = frozenset(string.ascii_letters + string.digits + '-')
+
+def _set_suffix_at(line: str, paren: int) -> Optional[Tuple[int, int, int]]:
+    """Match "(SET) collector" starting at paren
+    Returns: (close paren, collector start, collector end) or None
+    """
+    if not line[paren - 1].isspace():
+        return None
+    close = line.find(')', paren + 1)
+    if close <= paren + 1:
+        return None
+
+    length = len(line)
+    number_start = close + 1
+    while number_start < length and line[number_start].isspace():
+        number_start += 1
+    number_end = number_start
+    while number_end < length and line[number_end] in _COLLECTOR_NUMBER_CHARS:
+        number_end += 1
+    if number_start == close + 1 or number_end == number_start:
+        return None
+    return close, number_start, number_end
 
 class DeckService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.card_service = CardService(db)
 
     async def parse_decklist(self, decklist: str, commander1: Optional[str] = None, commander2: Optional[str] = None) -> ParsedDeck:
         """Parse a decklist string into structured deck data"""
@@ -45,8 +73,42 @@ class DeckService:
         # Find cards in database using name, set, and collector number
         found_cards, unknown_cards = await self._resolve_parsed_cards(parsed_cards)
 
-        # Create a mapping of found cards by name for easy lookup
-        found_cards_map = {card.name: card for card in found_cards}
+        # Handle commanders from input fields
+        commanders = []
+        commander_names = []
+        commander_issues = []
+        
+        # Find commanders from input fields
+        if commander1:
+            commander_card = await self._find_card_by_name(commander1)
+            if commander_card:
+                commanders.append(commander_card)
+                commander_names.append(commander1)
+            else:
+                commander_issues.append(DeckIssue(
+                    type="unknown_commander",
+                    text=f"Commander not found: '{commander1}'"
+                ))
+        
+        if commander2 and commander2.strip():
+            commander_card = await self._find_card_by_name(commander2)
+            if commander_card:
+                commanders.append(commander_card)
+                commander_names.append(commander2)
+            else:
+                commander_issues.append(DeckIssue(
+                    type="unknown_commander",
+                    text=f"Commander not found: '{commander2}'"
+                ))
+
+        # Map found cards by name and collect regular cards (exclude commanders) in one pass
+        commander_names_set = set(commander_names)
+        found_cards_map = {}
+        regular_cards = []
+        for card in found_cards:
+            found_cards_map[card.name] = card
+            if card.name not in commander_names_set:
+                regular_cards.append(card)
 
         # Create decklist cards with ScryfallCard objects, combining duplicates by name
         decklist_cards = []
@@ -63,32 +125,10 @@ class DeckService:
         for card_name, total_quantity in card_quantities.items():
             card = found_cards_map[card_name]
             # Convert ScryfallCard model to ScryfallCard schema
-            card_schema = ScryfallCard(
-                id=str(getattr(card, 'id', '')),
-                oracle_id=str(getattr(card, 'oracle_id', '')) if getattr(card, 'oracle_id', None) else None,
-                name=getattr(card, 'name', ''),
-                released_at=getattr(card, 'released_at', None),
-                set=getattr(card, 'set', None),
-                set_name=getattr(card, 'set_name', None),
-                collector_number=getattr(card, 'collector_number', None),
-                lang=getattr(card, 'lang', None),
-                cmc=getattr(card, 'cmc', None),
-                type_line=getattr(card, 'type_line', None),
-                oracle_text=getattr(card, 'oracle_text', None),
-                colors=getattr(card, 'colors', None),
-                color_identity=getattr(card, 'color_identity', []),
-                keywords=getattr(card, 'keywords', None),
-                legalities=getattr(card, 'legalities', {}),
-                image_uris=getattr(card, 'image_uris', None),
-                card_faces=getattr(card, 'card_faces', None),
-                prices=getattr(card, 'prices', None),
-                edhrec_rank=getattr(card, 'edhrec_rank', None)
-            )
-            decklist_card = DecklistCard(
-                card=card_schema,
+            decklist_cards.append(DecklistCard.model_construct(
+                card=self._to_card_schema(card),
                 quantity=total_quantity
-            )
-            decklist_cards.append(decklist_card)
+            ))
 
         # Add issues for unknown cards
         for unknown_card in unknown_cards:
@@ -99,66 +139,19 @@ class DeckService:
                 suggestions=suggestions
             ))
 
-        # Handle commanders from input fields
-        commanders = []
-        commander_names = []
-        
-        # Find commanders from input fields
-        if commander1:
-            commander_card = await self._find_card_by_name(commander1)
-            if commander_card:
-                commanders.append(commander_card)
-                commander_names.append(commander1)
-            else:
-                issues.append(DeckIssue(
-                    type="unknown_commander",
-                    text=f"Commander not found: '{commander1}'"
-                ))
-        
-        if commander2 and commander2.strip():
-            commander_card = await self._find_card_by_name(commander2)
-            if commander_card:
-                commanders.append(commander_card)
-                commander_names.append(commander2)
-            else:
-                issues.append(DeckIssue(
-                    type="unknown_commander",
-                    text=f"Commander not found: '{commander2}'"
-                ))
+        # Report commanders that could not be resolved
+        issues.extend(commander_issues)
 
-        # Add commanders to decklist_cards so they appear in the decklist tab
+        # Add commanders to decklist_cards so they appear in the decklist tab,
+        # unless the decklist already lists them
         for commander in commanders:
+            if commander.name in card_quantities:
+                continue
             # Convert ScryfallCard model to ScryfallCard schema
-            card_schema = ScryfallCard(
-                id=str(getattr(commander, 'id', '')),
-                oracle_id=str(getattr(commander, 'oracle_id', '')) if getattr(commander, 'oracle_id', None) else None,
-                name=getattr(commander, 'name', ''),
-                released_at=getattr(commander, 'released_at', None),
-                set=getattr(commander, 'set', None),
-                set_name=getattr(commander, 'set_name', None),
-                collector_number=getattr(commander, 'collector_number', None),
-                lang=getattr(commander, 'lang', None),
-                cmc=getattr(commander, 'cmc', None),
-                type_line=getattr(commander, 'type_line', None),
-                oracle_text=getattr(commander, 'oracle_text', None),
-                colors=getattr(commander, 'colors', None),
-                color_identity=getattr(commander, 'color_identity', []),
-                keywords=getattr(commander, 'keywords', None),
-                legalities=getattr(commander, 'legalities', {}),
-                image_uris=getattr(commander, 'image_uris', None),
-                card_faces=getattr(commander, 'card_faces', None),
-                prices=getattr(commander, 'prices', None),
-                edhrec_rank=getattr(commander, 'edhrec_rank', None)
-            )
-            commander_decklist_card = DecklistCard(
-                card=card_schema,
+            decklist_cards.append(DecklistCard.model_construct(
+                card=self._to_card_schema(commander),
                 quantity=1  # Commanders are always 1 copy
-            )
-            decklist_cards.append(commander_decklist_card)
-
-        # All other cards are regular cards (exclude commanders)
-        commander_names_set = set(commander_names)
-        regular_cards = [card for card in found_cards if card.name not in commander_names_set]
+            ))
 
         # Determine color identity
         color_identity = self._calculate_color_identity(commanders + regular_cards)
@@ -176,45 +169,82 @@ class DeckService:
             decklist=decklist_cards
         )
 
+    def _to_card_schema(self, card: ScryfallCardModel) -> ScryfallCard:
+        """Convert a ScryfallCard model to the ScryfallCard schema
+
+        Values come straight from the database, so the schema is built with
+        model_construct and skips field validation.
+        """
+        cmc = getattr(card, 'cmc', None)
+        return ScryfallCard.model_construct(
+            id=str(getattr(card, 'id', '')),
+            oracle_id=str(getattr(card, 'oracle_id', '')) if getattr(card, 'oracle_id', None) else None,
+            name=getattr(card, 'name', ''),
+            released_at=getattr(card, 'released_at', None),
+            set=getattr(card, 'set', None),
+            set_name=getattr(card, 'set_name', None),
+            collector_number=getattr(card, 'collector_number', None),
+            lang=getattr(card, 'lang', None),
+            cmc=float(cmc) if cmc is not None else None,
+            type_line=getattr(card, 'type_line', None),
+            oracle_text=getattr(card, 'oracle_text', None),
+            colors=getattr(card, 'colors', None),
+            color_identity=getattr(card, 'color_identity', []),
+            keywords=getattr(card, 'keywords', None),
+            legalities=getattr(card, 'legalities', {}),
+            image_uris=getattr(card, 'image_uris', None),
+            card_faces=getattr(card, 'card_faces', None),
+            prices=getattr(card, 'prices', None),
+            edhrec_rank=getattr(card, 'edhrec_rank', None)
+        )
+
     def _extract_card_info(self, line: str) -> Tuple[str, str, str, int]:
         """Extract card information from a decklist line
         Returns: (name, set, collector_number, quantity)
         """
-        patterns = [
-            # Format: "1 Card Name (SET) NUMBER" - most common format
-            r'^(\d+)x?\s+(.+?)\s+\(([^)]+)\)\s+(\d+).*$',
-            # Format: "1 Card Name (SET) NUMBER *F*" (with foil)
-            r'^(\d+)x?\s+(.+?)\s+\(([^)]+)\)\s+(\d+)\s*.*$',
-            # Format: "1 Cryptic Command (PLST) IMA-48" (with alphanumeric collector number)
-            r'^(\d+)x?\s+(.+?)\s+\(([^)]+)\)\s+([A-Z0-9\-]+).*$',
-            # Fallback: "1 Sol Ring" (no set info)
-            r'^(\d+)x?\s+(.+)$',
-            r'^(\d+)\s+(.+)$',  # "1 Sol Ring"
-            r'^(.+)$',          # Just the card name (quantity = 1)
-        ]
-
-        for pattern in patterns:
-            match = re.match(pattern, line, re.IGNORECASE)
-            if match:
-                groups = match.groups()
-                if len(groups) == 4:
-                    # Has set and collector number
-                    quantity = int(groups[0])
-                    name = groups[1].strip()
-                    set_code = groups[2].strip()
-                    collector_number = groups[3].strip()
-                    return name, set_code, collector_number, quantity
-                elif len(groups) == 2:
-                    # Has quantity but no set info
-                    quantity = int(groups[0])
-                    name = groups[1].strip()
-                    return name, "", "", quantity
-                else:
-                    # Just card name, default quantity 1
-                    name = groups[0].strip()
-                    return name, "", "", 1
-
-        return "", "", "", 0
+        # Drop a trailing foil marker up front; every line form then parses the same with or without it
+        stripped = line.rstrip()
+        if stripped[-3:].lower() == '*f*':
+            line = stripped[:-3].rstrip()
+
+        length = len(line)
+
+        # Quantity prefix: digits, an optional "x", then whitespace before the name
+        quantity_end = 0
+        while quantity_end < length and line[quantity_end].isdecimal():
+            quantity_end += 1
+        name_start = quantity_end
+        if quantity_end and name_start < length and line[name_start] in 'xX':
+            name_start += 1
+        text_start = name_start
+        while text_start < length and line[text_start].isspace():
+            text_start += 1
+
+        if quantity_end and name_start < text_start < length:
+            quantity = int(line[:quantity_end])
+
+            # The name runs up to the leftmost " (SET) collector" that follows it
+            paren = line.find('(', text_start + 2)
+            while paren != -1:
+                suffix = _set_suffix_at(line, paren)
+                if suffix:
+                    close, number_start, number_end = suffix
+                    return (
+                        line[name_start:paren].strip(),
+                        line[paren + 1:close].strip(),
+                        line[number_start:number_end],
+                        quantity
+                    )
+                paren = line.find('(', paren + 1)
+
+            # Has quantity but no set info
+            return line[text_start:].strip(), "", "", quantity
+
+        if not line:
+            return "", "", "", 0
+
+        # Just card name, default quantity 1
+        return line.strip(), "", "", 1
 
     async def _resolve_parsed_cards(self, parsed_cards: List[ParsedCard]) -> Tuple[List[ScryfallCardModel], List[ParsedCard]]:
         """Resolve parsed cards to database cards using name, set, and collector number"""
@@ -236,26 +266,27 @@ class DeckService:
 
     async def _find_card_by_details(self, name: str, set_code: str, collector_number: str) -> ScryfallCardModel:
         """Find a card by name, set, and collector number"""
-        query = self.db.query(ScryfallCardModel)
+        query = select(ScryfallCardModel)
         
         # Always match by name (case insensitive)
-        query = query.filter(ScryfallCardModel.name.ilike(name))
+        query = query.where(ScryfallCardModel.name.ilike(name))
         
         # If set code is provided, match by set
         if set_code:
-            query = query.filter(ScryfallCardModel.set.ilike(set_code))
+            query = query.where(ScryfallCardModel.set.ilike(set_code))
         
         # If collector number is provided, match by collector number
         if collector_number:
-            query = query.filter(ScryfallCardModel.collector_number.ilike(collector_number))
+            query = query.where(ScryfallCardModel.collector_number.ilike(collector_number))
         
-        return query.first()
+        result = await self.db.execute(query.limit(1))
+        return result.scalars().first()
 
     async def _find_card_by_name(self, name: str) -> ScryfallCardModel:
         """Find a card by name only (case insensitive)"""
-        query = self.db.query(ScryfallCardModel)
-        query = query.filter(ScryfallCardModel.name.ilike(name))
-        return query.first()
+        query = select(ScryfallCardModel).where(ScryfallCardModel.name.ilike(name))
+        result = await self.db.execute(query.limit(1))
+        return result.scalars().first()
 
     async def _resolve_card_names(self, card_names: List[str]) -> Tuple[List[ScryfallCardModel], List[str]]:
         """Resolve card names to database cards"""
@@ -263,7 +294,7 @@ class DeckService:
         unknown_cards = []
 
         for card_name in card_names:
-            card = await self.card_service.find_card_by_name(card_name)
+            card = await self._find_card_by_name(card_name)
             if card:
                 found_cards.append(card)
             else:
@@ -274,11 +305,12 @@ class DeckService:
     async def _find_card_suggestions(self, card_name: str) -> List[str]:
         """Find similar card names for unknown cards"""
         # Simple fuzzy matching - could be improved
-        query = self.db.query(ScryfallCardModel.name).filter(
+        query = select(ScryfallCardModel.name).where(
             ScryfallCardModel.name.ilike(f"%{card_name[:3]}%")
         ).limit(3)
 
-        suggestions = [row[0] for row in query.all()]
+        result = await self.db.execute(query)
+        suggestions = list(result.scalars().all())
         return suggestions
 
     def _separate_commanders(self, cards: List[ScryfallCardModel]) -> Tuple[List[ScryfallCardModel], List[ScryfallCardModel]]:
@@ -287,23 +319,17 @@ class DeckService:
         regular_cards = []
 
         for card in cards:
-            if card.is_commander():
-                commanders.append(card)
-            else:
-                regular_cards.append(card)
+            (commanders if card.is_commander else regular_cards).append(card)
 
         return commanders, regular_cards
 
     def _calculate_color_identity(self, cards: List[ScryfallCardModel]) -> Set[str]:
-        """Calculate the color identity of a list of cards"""
-        color_identity = set()
-
-        for card in cards:
-            card_colors = getattr(card, 'color_identity', None)
-            if card_colors:
-                color_identity.update(card_colors)
+        """Calculate the color identity of a list of cards
 
-        return color_identity
+        The cards are already loaded, so their precomputed color_identity_mask
+        values are OR-ed together here rather than in another query.
+        """
+        return mask_to_color_identity(reduce(or_, (card.color_identity_mask or 0 for card in cards), 0))
 
     def _validate_deck_composition(self, commanders: List[ScryfallCardModel], regular_cards: List[ScryfallCardModel], decklist_cards: List[DecklistCard]) -> List[DeckIssue]:
         """Validate deck composition and identify issues"""
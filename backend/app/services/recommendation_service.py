@@ -1,5 +1,10 @@
+import asyncio
 import hashlib
 import logging
+import threading
+import uuid
+from functools import lru_cache
+from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.card import ScryfallCard
@@ -11,6 +16,40 @@ from app.schemas.deck import (
 from app.services.card_service import CardService
 from app.mrec.inference import InferenceRecommender
 
+ALGO_VERSION = "2025-09-14a"
+
+_DECK_HASH_MODULUS = 1 << 128
+
+INFERENCE_SUMMARY = "MagicRec (20k public decks)"
+
+# Serialized responses for recently requested deck compositions, per process
+_response_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_response_cache_lock = threading.RLock()
+
+def _normalize_card_id(card_id: str) -> str:
+    """Canonical spelling of a card ID, matching str() of the database UUID
+
+    The database compares IDs as UUIDs, so any spelling it accepts (case,
+    braces, no hyphens) must map back to the same card.
+    """
+    try:
+        return str(uuid.UUID(card_id))
+    except ValueError:
+        return card_id
+
+@lru_cache(maxsize=65536)
+def _card_digest(card_id: str) -> int:
+    """128-bit digest of a single card ID, cached across requests
+
+    UUIDs are hashed as their 16 raw bytes, so spellings of the same ID
+    (case, braces, no hyphens) share a digest.
+    """
+    try:
+        data = uuid.UUID(card_id).bytes
+    except ValueError:
+        data = card_id.encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=16).digest(), "big")
+
 class RecommendationService:
     def __init__(self, db: Session, inference_recommender: InferenceRecommender):
         self.db = db
@@ -31,16 +70,36 @@ class RecommendationService:
     ) -> RecommendationsResponse:
         """Generate upgrade recommendations for a deck"""
 
-        # Get deck cards for context
-        commanders = await self.card_service.get_cards_by_ids(commander_ids) if commander_ids else []
-        deck_cards = await self.card_service.get_cards_by_ids(deck_card_ids) if deck_card_ids else []
+        # Calculate deck hash for context
+        deck_hash = self._calculate_deck_hash(commander_ids + deck_card_ids)
+
+        # Identical deck compositions with identical options get the same response
+        cache_key = (
+            ALGO_VERSION, tuple(sorted(commander_ids)), deck_hash, budget_cents, top_k,
+            explain, explain_top_k, include_evidence, include_features, allow_unresolved
+        )
+        with _response_cache_lock:
+            cached = _response_cache.get(cache_key)
+        if cached is not None:
+            response = RecommendationsResponse.model_validate_json(cached)
+            response.context.commander_ids = commander_ids
+            return response
+
+        # Get commanders and deck cards for context in a single round-trip
+        all_cards = await self.card_service.get_cards_by_ids(commander_ids + deck_card_ids) if commander_ids else []
+        cards_by_id = {str(card.id): card for card in all_cards}
+        commanders = [
+            cards_by_id[card_id] for card_id in dict.fromkeys(map(_normalize_card_id, commander_ids))
+            if card_id in cards_by_id
+        ]
+        deck_cards = [
+            cards_by_id[card_id] for card_id in dict.fromkeys(map(_normalize_card_id, deck_card_ids))
+            if card_id in cards_by_id
+        ]
 
         if not commanders:
             raise ValueError("No valid commanders found")
 
-        # Calculate deck hash for context
-        deck_hash = self._calculate_deck_hash(commander_ids + deck_card_ids)
-
         # Get color identity from commanders
         color_identity = set()
         for commander in commanders:
@@ -60,7 +119,6 @@ class RecommendationService:
         except Exception as e:
             # log error, return empty recommendations
             logging.error(f"InferenceRecommender failed: {e}")
-            
 
         # Create response
         context = RecommendContext(
@@ -70,12 +128,19 @@ class RecommendationService:
             filters={"budget_cents": budget_cents}
         )
 
-        return RecommendationsResponse(
-            algo_version="2025-09-14a",
+        response = RecommendationsResponse(
+            algo_version=ALGO_VERSION,
             context=context,
             recommendations=recommendations[:top_k]
         )
 
+        # Only cache real results so a transient engine or database failure is retried
+        if response.recommendations:
+            with _response_cache_lock:
+                _response_cache[cache_key] = response.model_dump_json()
+
+        return response
+
  
     async def _get_inference_recommendations(
         self,
@@ -85,6 +150,7 @@ class RecommendationService:
         allow_unresolved: bool = True
     ) -> List[Recommendation]:
         """Get recommendations using the InferenceRecommender"""
+        recommendations: List[Recommendation] = []
         try:
             # Get oracle IDs for commanders and deck cards
             card_identifiers = []
@@ -97,8 +163,9 @@ class RecommendationService:
             for card in deck_cards:
                 card_identifiers.append(card.oracle_id)
 
-            # invoke inference recommender
-            result = self.inference_recommender.recommend(
+            # invoke inference recommender in a worker thread so scoring does not block the event loop
+            result = await asyncio.to_thread(
+                self.inference_recommender.recommend,
                 card_identifiers=card_identifiers,
                 top_n=top_n,
                 allow_unresolved=allow_unresolved
@@ -113,29 +180,39 @@ class RecommendationService:
             # swapped are swaps suggested to improve the deck
             swaps = result.deck.swaps
             
-            # Convert InferenceRecommender results to our Recommendation format
+            # Get card data from the inference recommender
+            engine_cards = [
+                (score, reason, self.inference_recommender.get_card_by_oracle_id(score.oracle_id))
+                for score, reason in ranked
+            ]
+
+            # Fetch the scryfall cards for all ranked results in one query
+            scryfall_cards = await self.card_service.get_cards_by_oracle_ids(
+                [engine_card.oracle_uid for _, _, engine_card in engine_cards if engine_card and engine_card.oracle_uid]
+            )
+
+            # Convert InferenceRecommender results to our Recommendation format; values come from
+            # the engine and the database, so validation is left to the response model
             recommendations = []
-            for score, reason in ranked:
-                # Get card data from the inference recommender
-                engine_card = self.inference_recommender.get_card_by_oracle_id(score.oracle_id)
+            for score, reason, engine_card in engine_cards:
                 if engine_card:
                     # get scryfall card
-                    scryfall_card = await self.card_service.get_card_by_oracle_id(engine_card.oracle_uid) if engine_card.oracle_uid else None
+                    scryfall_card = scryfall_cards.get(engine_card.oracle_uid) if engine_card.oracle_uid else None
 
                     # Convert CardRecord to our expected format
                     card_data = scryfall_card
                     
-                    recommendation = Recommendation(
+                    recommendation = Recommendation.model_construct(
                         card=card_data or {
                             "id": score.oracle_id,
                             "name": engine_card.name,
                         },
                         score=score.total,
-                        explanation=RecommendationExplanation(
-                            summary=f"MagicRec (20k public decks)",
+                        explanation=RecommendationExplanation.model_construct(
+                            summary=INFERENCE_SUMMARY,
                             reasons=[
                                 # TODO: add more information in CandidateScore and RecommendationReason
-                                ExplanationReason(
+                                ExplanationReason.model_construct(
                                     type="inference_score",
                                     detail=f"Score: {score.total:.3f}, reason: {reason.summary}",
                                     # use the total score as weight for now
@@ -156,7 +233,10 @@ class RecommendationService:
         return recommendations
 
     def _calculate_deck_hash(self, card_ids: List[str]) -> str:
-        """Calculate a hash for the deck composition"""
-        sorted_ids = sorted(card_ids)
-        deck_string = ''.join(sorted_ids)
-        return hashlib.sha256(deck_string.encode()).hexdigest()[:16]
\ No newline at end of file
+        """Calculate a hash for the deck composition
+
+        Per-card digests are summed modulo 2**128, which is independent of card
+        order without sorting and, unlike XOR, keeps duplicate cards distinct.
+        """
+        folded = sum(map(_card_digest, card_ids)) % _DECK_HASH_MODULUS
+        return f"{folded:032x}"[:16]
\ No newline at end of file
@@ -5,7 +5,40 @@ from app.api.v1.api import api_router
 from app.core.config import settings
 from app.core.inference import set_inference_recommender, get_inference_recommender
 from app.mrec.inference import InferenceRecommender
+import asyncio
+import json
 import logging
+import os
+from datetime import datetime
+
+def _write_json(path: str, data: dict) -> None:
+    """Write data as JSON, creating the parent directory if needed"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+async def _dump_init_data(inference_recommender: InferenceRecommender) -> None:
+    """Dump InferenceRecommender initialization details (scalar counts only)"""
+    try:
+        init_data = {
+            "timestamp": datetime.now().isoformat(),
+            "dataset_path": settings.DATASET_PATH,
+            "similarity_model_path": settings.SIMILARITY_MODEL_PATH,
+            "dataset_cards_count": len(inference_recommender.dataset.cards),
+            "dataset_decks_count": len(inference_recommender.dataset.decks),
+            "commander_profiles_count": len(inference_recommender.dataset.commander_profiles),
+            "ban_list_count": len(inference_recommender.dataset.ban_list),
+            "similarity_model_compatible": True,
+            "matrix_bundle_card_totals_count": len(inference_recommender.bundle.card_totals),
+            "matrix_bundle_card_index_count": len(inference_recommender.bundle.card_index)
+        }
+
+        debug_file = os.path.join("debug", f"inference_init_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        await asyncio.to_thread(_write_json, debug_file, init_data)
+
+        logging.info(f"InferenceRecommender debug data dumped to: {debug_file}")
+    except Exception as e:
+        logging.warning(f"Failed to dump InferenceRecommender debug data: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,36 +55,9 @@ async def lifespan(app: FastAPI):
         set_inference_recommender(inference_recommender)
         logging.info("InferenceRecommender initialized successfully")
         
-        # Dump initialization details in debug mode
+        # Dump initialization details in debug mode, off the startup critical path
         if settings.DEBUG:
-            import json
-            from datetime import datetime
-            
-            init_data = {
-                "timestamp": datetime.now().isoformat(),
-                "dataset_path": settings.DATASET_PATH,
-                "similarity_model_path": settings.SIMILARITY_MODEL_PATH,
-                "dataset_cards_count": len(inference_recommender.dataset.cards),
-                "dataset_decks_count": len(inference_recommender.dataset.decks),
-                "commander_profiles_count": len(inference_recommender.dataset.commander_profiles),
-                "ban_list_count": len(inference_recommender.dataset.ban_list),
-                "similarity_model_compatible": True,
-                "matrix_bundle_card_totals_count": len(inference_recommender.bundle.card_totals),
-                "matrix_bundle_card_index_count": len(inference_recommender.bundle.card_index)
-            }
-            
-            # Create debug directory if it doesn't exist
-            import os
-            debug_dir = "debug"
-            if not os.path.exists(debug_dir):
-                os.makedirs(debug_dir)
-            
-            # Dump initialization data
-            debug_file = os.path.join(debug_dir, f"inference_init_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            with open(debug_file, 'w') as f:
-                json.dump(init_data, f, indent=2, default=str)
-            
-            logging.info(f"InferenceRecommender debug data dumped to: {debug_file}")
+            app.state.debug_dump_task = asyncio.create_task(_dump_init_data(inference_recommender))
             
     except Exception as e:
         logging.error(f"Failed to initialize InferenceRecommender: {e}")
@@ -0,0 +1,59 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+from app.models.card import ScryfallCard
+from app.services.card_service import CardService
+
+
+class _FakeQuery(Query):
+    """Builds the real query but answers it from canned rows"""
+
+    def all(self):
+        self.session.statements.append(self.statement)
+        return self.session.rows
+
+
+class _FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def query(self, *entities):
+        return _FakeQuery(entities, session=self)
+
+
+def _card(oracle_id: str, name: str) -> SimpleNamespace:
+    return SimpleNamespace(oracle_id=oracle_id, data={"oracle_id": oracle_id, "name": name})
+
+
+class TestCardsByOracleIds:
+    """Test cases for the batched Oracle ID lookup"""
+
+    @pytest.mark.asyncio
+    async def test_returns_found_cards_in_request_order(self):
+        """Test that cards come back keyed by Oracle ID, skipping unknown IDs"""
+        db = _FakeSession([_card("o2", "Counterspell"), _card("o1", "Sol Ring")])
+        cards = await CardService(db).get_cards_by_oracle_ids(["o1", "missing", "o2"])
+
+        assert list(cards) == ["o1", "o2"]
+        assert cards["o1"]["name"] == "Sol Ring"
+        assert len(db.statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_distinct_on_picks_a_deterministic_printing(self):
+        """Test that DISTINCT ON is ordered so each Oracle ID maps to one fixed printing"""
+        db = _FakeSession([])
+        await CardService(db).get_cards_by_oracle_ids(["o1", "o1"])
+
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "DISTINCT ON (scryfall_cards.oracle_id)" in sql
+        assert ("ORDER BY scryfall_cards.oracle_id, scryfall_cards.released_at DESC NULLS LAST, "
+                "scryfall_cards.id") in sql
+
+    @pytest.mark.asyncio
+    async def test_empty_request_skips_the_query(self):
+        """Test that no Oracle IDs means no database round trip"""
+        db = _FakeSession([])
+        assert await CardService(db).get_cards_by_oracle_ids([]) == {}
+        assert db.statements == []
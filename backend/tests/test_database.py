@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+from app.core import database
+
+
+def test_async_url_translates_libpq_options():
+    """Test that libpq-only query options do not reach asyncpg as keywords"""
+    url, connect_args = database._async_database_url(
+        "postgresql://user:pw@db:5432/mtg?sslmode=require&connect_timeout=10&options=-c%20x&host=/tmp"
+    )
+
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"host": "/tmp"}
+    assert connect_args == {"ssl": "require", "timeout": 10.0}
+
+
+def test_import_does_not_need_asyncpg():
+    """Test that importing the module (as the import scripts do for Base) works without asyncpg"""
+    # A None entry in sys.modules makes "import asyncpg" raise ModuleNotFoundError
+    code = "import sys; sys.modules['asyncpg'] = None; from app.core.database import Base"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=Path(__file__).parents[1]
+    )
+
+    assert result.returncode == 0, result.stderr
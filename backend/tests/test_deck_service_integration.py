@@ -1,6 +1,10 @@
 import pytest
+import uuid
 from dataclasses import dataclass
+from types import SimpleNamespace
 from typing import Tuple
+from app.models.card import color_identity_to_mask
+from app.services.deck_service import DeckService
 
 
 @dataclass
@@ -13,44 +17,8 @@ class ParsedCard:
 
 
 def _extract_card_info(line: str) -> Tuple[str, str, str, int]:
-    """Extract card information from a decklist line
-    Returns: (name, set, collector_number, quantity)
-    """
-    import re
-    
-    patterns = [
-        # Format: "1 Cryptic Command (PLST) IMA-48"
-        r'^(\d+)x?\s+(.+?)\s+\(([^)]+)\)\s+([A-Z0-9\-]+).*$',
-        # Format: "1 Cryptic Command (PLST) IMA-48 *F*" (with foil)
-        r'^(\d+)x?\s+(.+?)\s+\(([^)]+)\)\s+([A-Z0-9\-]+)\s*.*$',
-        # Fallback: "1 Sol Ring" (no set info)
-        r'^(\d+)x?\s+(.+)$',
-        r'^(\d+)\s+(.+)$',  # "1 Sol Ring"
-        r'^(.+)$',          # Just the card name (quantity = 1)
-    ]
-
-    for pattern in patterns:
-        match = re.match(pattern, line, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            if len(groups) == 4:
-                # Has set and collector number
-                quantity = int(groups[0])
-                name = groups[1].strip()
-                set_code = groups[2].strip()
-                collector_number = groups[3].strip()
-                return name, set_code, collector_number, quantity
-            elif len(groups) == 2:
-                # Has quantity but no set info
-                quantity = int(groups[0])
-                name = groups[1].strip()
-                return name, "", "", quantity
-            else:
-                # Just card name, default quantity 1
-                name = groups[0].strip()
-                return name, "", "", 1
-
-    return "", "", "", 0
+    """Parse a line with DeckService's own parser (it never touches the database)"""
+    return DeckService(None)._extract_card_info(line)
 
 
 class TestDeckParsingAdvanced:
@@ -179,3 +147,61 @@ Command Tower
         for line, expected in test_cases:
             result = _extract_card_info(line)
             assert result == expected, f"Failed for line: '{line}'"
+
+
+def _fake_card(name: str, color_identity):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        name=name,
+        color_identity=list(color_identity),
+        color_identity_mask=color_identity_to_mask(color_identity)
+    )
+
+
+class _FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.values[0] if self.values else None
+
+    def all(self):
+        return self.values
+
+
+class _FakeAsyncSession:
+    """Answers DeckService's queries from a fixed set of cards"""
+
+    def __init__(self, cards):
+        self.cards = cards
+
+    async def execute(self, query):
+        name = query.compile().params.get("name_1", "")
+        return _FakeResult([card for card in self.cards if card.name.lower() == name.lower()])
+
+
+class TestParseDecklist:
+    """Tests for DeckService.parse_decklist against a fake database session"""
+
+    @pytest.mark.asyncio
+    async def test_commander_listed_in_decklist_appears_once(self):
+        """Test commander de-duplication and the color identity decoded from the mask"""
+        atraxa = _fake_card("Atraxa, Praetors' Voice", "WUBG")
+        sol_ring = _fake_card("Sol Ring", "")
+        swords = _fake_card("Swords to Plowshares", "W")
+        service = DeckService(_FakeAsyncSession([atraxa, sol_ring, swords]))
+
+        decklist = """1 Atraxa, Praetors' Voice
+1 Sol Ring (C21) 263
+1 Swords to Plowshares"""
+        deck = await service.parse_decklist(decklist, commander1="Atraxa, Praetors' Voice")
+
+        names = [entry.card.name for entry in deck.decklist]
+        assert names.count("Atraxa, Praetors' Voice") == 1
+        assert sorted(names) == ["Atraxa, Praetors' Voice", "Sol Ring", "Swords to Plowshares"]
+        assert deck.commander_ids == [str(atraxa.id)]
+        assert deck.card_ids == [str(sol_ring.id), str(swords.id)]
+        assert deck.color_identity == ["B", "G", "U", "W"]
@@ -0,0 +1,109 @@
+import pytest
+import uuid
+from app.schemas.deck import Recommendation, RecommendationExplanation
+from app.services.recommendation_service import RecommendationService
+
+
+def _service() -> RecommendationService:
+    return RecommendationService(db=None, inference_recommender=None)
+
+
+class TestDeckHash:
+    """Test cases for the deck composition hash"""
+
+    def test_hash_is_order_independent(self):
+        """Test that card order does not change the hash"""
+        service = _service()
+        ids = ["a1", "b2", "c3", "d4"]
+        assert service._calculate_deck_hash(ids) == service._calculate_deck_hash(list(reversed(ids)))
+
+    def test_hash_distinguishes_duplicates(self):
+        """Test that repeated cards are not cancelled out"""
+        service = _service()
+        assert service._calculate_deck_hash(["a1", "b2", "b2"]) != service._calculate_deck_hash(["a1"])
+
+    def test_hash_ignores_uuid_spelling(self):
+        """Test that equivalent UUID spellings hash the same"""
+        service = _service()
+        card_id = "5f8287b1-5bb6-5f4c-ad17-316a40d5bb0c"
+        assert service._calculate_deck_hash([card_id]) == service._calculate_deck_hash([card_id.upper()])
+
+    def test_hash_length(self):
+        """Test that the hash keeps its 16 character width"""
+        service = _service()
+        assert len(service._calculate_deck_hash(["a1", "b2"])) == 16
+
+
+class _FakeCard:
+    def __init__(self, card_id: str):
+        self.id = card_id
+        self.oracle_id = card_id
+        self.name = card_id
+        self.color_identity = []
+
+
+class _FakeCardService:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_cards_by_ids(self, card_ids):
+        self.calls += 1
+        return [_FakeCard(card_id) for card_id in card_ids]
+
+
+class _UuidCardService(_FakeCardService):
+    """Returns cards with the canonical UUID spelling, as PostgreSQL does"""
+
+    async def get_cards_by_ids(self, card_ids):
+        self.calls += 1
+        return [_FakeCard(str(uuid.UUID(card_id))) for card_id in card_ids]
+
+
+class TestCardLookup:
+    """Test cases for matching fetched cards back to the request"""
+
+    @pytest.mark.asyncio
+    async def test_uppercase_commander_id_is_found(self):
+        """Test that a commander ID in another spelling still resolves"""
+        service = _service()
+        service.card_service = _UuidCardService()
+        commanders_seen = []
+
+        async def fake_inference(commanders, **kwargs):
+            commanders_seen.extend(commanders)
+            return [Recommendation(
+                card={"id": "rec-1", "name": "Sol Ring"},
+                score=1.0,
+                explanation=RecommendationExplanation(summary="test", reasons=[])
+            )]
+        service._get_inference_recommendations = fake_inference
+
+        commander_id = "9c0c2b2e-4c4e-4b65-8f3a-3c1f0f6f2d11"
+        response = await service.get_recommendations([commander_id.upper()], ["{%s}" % commander_id])
+
+        assert [card.id for card in commanders_seen] == [commander_id]
+        assert len(response.recommendations) == 1
+
+
+class TestResponseCache:
+    """Test cases for the recommendations response cache"""
+
+    @pytest.mark.asyncio
+    async def test_identical_request_is_served_from_cache(self):
+        """Test that a repeated deck skips the database and the engine"""
+        service = _service()
+        service.card_service = _FakeCardService()
+
+        async def fake_inference(**kwargs):
+            return [Recommendation(
+                card={"id": "rec-1", "name": "Sol Ring"},
+                score=1.0,
+                explanation=RecommendationExplanation(summary="test", reasons=[])
+            )]
+        service._get_inference_recommendations = fake_inference
+
+        first = await service.get_recommendations(["cache-cmdr"], ["cache-a", "cache-b"])
+        second = await service.get_recommendations(["cache-cmdr"], ["cache-b", "cache-a"])
+
+        assert service.card_service.calls == 1  # one combined lookup, first request only
+        assert second.model_dump() == first.model_dump()
@@ -6,22 +6,173 @@ Downloads the latest bulk data from Scryfall and imports it into PostgreSQL.
 
 import sys
 import os
+import io
 import json
 import gzip
+import ijson
+import orjson
 import requests
-from datetime import datetime, date
+from datetime import date
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 # Add parent directory to path to import our app modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 from app.core.database import Base
-from app.models.card import ScryfallCard
+from app.models.card import color_identity_to_mask
+
+# Column order of the rows built by process_card_data
+CARD_COLUMNS = (
+    "id", "oracle_id", "name", "released_at", "set", "set_name", "collector_number", "lang",
+    "cmc", "type_line", "oracle_text", "colors", "color_identity", "color_identity_mask",
+    "keywords", "legalities", "image_uris", "card_faces", "prices", "edhrec_rank", "data",
+)
+
+# Secondary indexes on scryfall_cards, dropped before the bulk load and rebuilt after it
+CARD_INDEXES = {
+    "idx_cards_name_trgm": "CREATE INDEX IF NOT EXISTS idx_cards_name_trgm ON scryfall_cards USING gin (name gin_trgm_ops)",
+    "idx_cards_oracle_text_gin": "CREATE INDEX IF NOT EXISTS idx_cards_oracle_text_gin ON scryfall_cards USING gin (to_tsvector('english', coalesce(oracle_text,'')))",
+    "idx_cards_color_identity": "CREATE INDEX IF NOT EXISTS idx_cards_color_identity ON scryfall_cards USING gin (color_identity)",
+    "idx_cards_type_line": "CREATE INDEX IF NOT EXISTS idx_cards_type_line ON scryfall_cards USING gin (to_tsvector('english', coalesce(type_line,'')))",
+    "idx_cards_legalities": "CREATE INDEX IF NOT EXISTS idx_cards_legalities ON scryfall_cards USING gin ((legalities::jsonb) jsonb_ops)",
+}
+
+# WUBRG bits (W=1, U=2, B=4, R=8, G=16) of existing rows, from their color_identity arrays
+BACKFILL_COLOR_IDENTITY_MASK_SQL = """
+    UPDATE scryfall_cards SET color_identity_mask =
+        (CASE WHEN 'W' = ANY(color_identity) THEN 1 ELSE 0 END) |
+        (CASE WHEN 'U' = ANY(color_identity) THEN 2 ELSE 0 END) |
+        (CASE WHEN 'B' = ANY(color_identity) THEN 4 ELSE 0 END) |
+        (CASE WHEN 'R' = ANY(color_identity) THEN 8 ELSE 0 END) |
+        (CASE WHEN 'G' = ANY(color_identity) THEN 16 ELSE 0 END)
+"""
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Read the bulk data in 1 MiB chunks rather than the 8-64 KiB defaults
+READ_BUFFER_SIZE = 1 << 20
+
+COPY_CARDS_SQL = f"COPY scryfall_cards ({', '.join(CARD_COLUMNS)}) FROM STDIN"
+
+def _copy_field(value: Any) -> str:
+    """Format a value as a COPY text format field"""
+    if value is None:
+        return "\\N"
+    # Backslash-escape the characters COPY text format reserves; chained str.replace
+    # is ~10x faster than str.translate on the large JSON fields
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _pg_array(values: Optional[list]) -> Optional[str]:
+    """Format a list of strings as a PostgreSQL array literal"""
+    if values is None:
+        return None
+    return "{" + ",".join('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values) + "}"
+
+def _json(value: Any) -> str:
+    """Serialize a JSON column value (None becomes JSON null, as the ORM stored it)"""
+    return orjson.dumps(value).decode()
+
+def card_to_row(card_data: Dict[str, Any]) -> Optional[Tuple]:
+    """Convert Scryfall card data to a row of CARD_COLUMNS values"""
+    try:
+        # Parse date (always YYYY-MM-DD; fromisoformat is C code, unlike strptime)
+        released_at = None
+        if card_data.get("released_at"):
+            released_at = date.fromisoformat(card_data["released_at"])
+
+        color_identity = card_data.get("color_identity", [])
+
+        return (
+            card_data["id"],
+            card_data.get("oracle_id"),
+            card_data["name"],
+            released_at,
+            card_data.get("set"),
+            card_data.get("set_name"),
+            card_data.get("collector_number"),
+            card_data.get("lang"),
+            card_data.get("cmc"),
+            card_data.get("type_line"),
+            card_data.get("oracle_text"),
+            _pg_array(card_data.get("colors")),
+            _pg_array(color_identity),
+            color_identity_to_mask(color_identity),
+            _pg_array(card_data.get("keywords")),
+            _json(card_data.get("legalities", {})),
+            _json(card_data.get("image_uris")),
+            _json(card_data.get("card_faces")),
+            _json(card_data.get("prices")),
+            card_data.get("edhrec_rank"),
+            _json(card_data)  # Store full Scryfall data
+        )
+
+    except Exception as e:
+        print(f"Error processing card {card_data.get('name', 'Unknown')}: {e}")
+        return None
+
+def _copy_lines(cards: List[Dict[str, Any]]) -> List[str]:
+    """Convert a batch of cards to COPY lines (runs in a worker process)"""
+    lines = []
+    for card_data in cards:
+        row = card_to_row(card_data)
+        if row:
+            lines.append("\t".join(map(_copy_field, row)) + "\n")
+    return lines
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to size items"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _conversion_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Start a pool of `workers` conversion processes, or None to convert inline"""
+    if workers <= 1:
+        return None
+    pool = ProcessPoolExecutor(max_workers=workers)
+    # Workers are only forked on the first submit; do that now, before the caller opens
+    # any database connection a forked worker could inherit
+    pool.submit(int).result()
+    return pool
+
+def _convert_batches(
+    cards: Iterable[Dict[str, Any]], batch_size: int, pool: Optional[ProcessPoolExecutor], workers: int
+) -> Iterator[List[str]]:
+    """Yield the COPY lines of each batch of cards, in order, converted in `pool` when given"""
+    batches = _batched(cards, batch_size)
+    if pool is None:
+        yield from map(_copy_lines, batches)
+        return
+
+    # Bound the batches in flight so memory stays flat however far parsing runs ahead
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(_copy_lines, batch))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _load_import_cache(path: Path) -> Dict[str, Any]:
+    """Read what the last successful import downloaded (empty if unknown)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_import_cache(path: Path, cache: Dict[str, Any]) -> None:
+    """Record what a successful import downloaded"""
+    path.parent.mkdir(exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=2)
 
 @dataclass
 class BulkDataInfo:
@@ -40,12 +191,22 @@ class ScryfallImporter:
 
     def __init__(self, database_url: str):
         self.engine = create_engine(database_url)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
     def create_tables(self):
         """Create database tables"""
         print("Creating database tables...")
         Base.metadata.create_all(bind=self.engine)
+        # create_all does not add columns to an existing table; backfill the mask when adding it
+        # (as the Alembic revision does) so cards kept by a skipped import are not colorless
+        with self.engine.connect() as conn:
+            has_mask = conn.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM information_schema.columns"
+                " WHERE table_name = 'scryfall_cards' AND column_name = 'color_identity_mask')"
+            )).scalar()
+            if not has_mask:
+                conn.execute(text("ALTER TABLE scryfall_cards ADD COLUMN color_identity_mask SMALLINT NOT NULL DEFAULT 0"))
+                conn.execute(text(BACKFILL_COLOR_IDENTITY_MASK_SQL))
+            conn.commit()
         print("Database tables created.")
 
     def get_bulk_data_info(self) -> Dict[str, BulkDataInfo]:
@@ -85,134 +246,149 @@ class ScryfallImporter:
         print(f"Downloaded to {output_path}")
         return output_path
 
-    def process_card_data(self, card_data: Dict[str, Any]) -> Optional[ScryfallCard]:
-        """Convert Scryfall card data to our database model"""
-        try:
-            # Parse date
-            released_at = None
-            if card_data.get("released_at"):
-                released_at = datetime.strptime(card_data["released_at"], "%Y-%m-%d").date()
-
-            # Create card object
-            card = ScryfallCard(
-                id=card_data["id"],
-                oracle_id=card_data.get("oracle_id"),
-                name=card_data["name"],
-                released_at=released_at,
-                set=card_data.get("set"),
-                set_name=card_data.get("set_name"),
-                collector_number=card_data.get("collector_number"),
-                lang=card_data.get("lang"),
-                cmc=card_data.get("cmc"),
-                type_line=card_data.get("type_line"),
-                oracle_text=card_data.get("oracle_text"),
-                colors=card_data.get("colors"),
-                color_identity=card_data.get("color_identity", []),
-                keywords=card_data.get("keywords"),
-                legalities=card_data.get("legalities", {}),
-                image_uris=card_data.get("image_uris"),
-                card_faces=card_data.get("card_faces"),
-                prices=card_data.get("prices"),
-                edhrec_rank=card_data.get("edhrec_rank"),
-                data=card_data  # Store full Scryfall data
-            )
-
-            return card
-
-        except Exception as e:
-            print(f"Error processing card {card_data.get('name', 'Unknown')}: {e}")
-            return None
-
-    def import_cards(self, file_path: Path, batch_size: int = 1000) -> int:
+    def import_cards(self, file_path: Path, batch_size: int = 1000, workers: Optional[int] = None) -> int:
         """Import cards from a bulk data file"""
         print(f"Importing cards from {file_path}")
 
+        with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as raw:
+            return self._import_stream(raw, batch_size, workers)
+
+    def import_cards_from_url(
+        self,
+        bulk_info: BulkDataInfo,
+        etag: Optional[str] = None,
+        batch_size: int = 1000,
+        workers: Optional[int] = None
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """Import cards straight from the bulk data download, without writing it to disk
+
+        Returns the imported count and the response ETag. When etag matches
+        the server's copy nothing is downloaded and the count is None.
+        """
+        print(f"Streaming {bulk_info.name} from {bulk_info.download_uri}")
+        print(f"File size: {bulk_info.size / 1024 / 1024:.1f} MB")
+
+        headers = {"If-None-Match": etag} if etag else {}
+        with requests.get(bulk_info.download_uri, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                print("Bulk data not modified since the last import")
+                return None, etag
+            response.raise_for_status()
+            # Undo any Content-Encoding so the parser sees the payload itself, and keep the
+            # stream readable at EOF, where GzipFile still probes for another member
+            response.raw.decode_content = True
+            response.raw.auto_close = False
+            imported_count = self._import_stream(
+                io.BufferedReader(response.raw, buffer_size=READ_BUFFER_SIZE), batch_size, workers
+            )
+            return imported_count, response.headers.get("ETag")
+
+    def _import_stream(self, raw: io.BufferedReader, batch_size: int, workers: Optional[int]) -> int:
+        """Replace the card table with the cards of a bulk data stream
+
+        Cards are converted in a pool of `workers` processes (default: one per
+        CPU) while this process keeps parsing the stream and loading batches;
+        with a single worker they are converted inline.
+
+        Downtime: the TRUNCATE ... CASCADE takes an ACCESS EXCLUSIVE lock on
+        scryfall_cards and every table referencing it (cooc_stats, interactions)
+        and holds it until the load commits, i.e. for the whole download. Any
+        query against those tables - including the API's card lookups and
+        recommendations - blocks until then, so run the import while the API is
+        stopped or can tolerate that stall.
+        """
         imported_count = 0
-        batch = []
 
-        # Clear existing data
-        with self.SessionLocal() as db:
-            print("Clearing existing card data...")
-            db.execute(text("TRUNCATE TABLE scryfall_cards CASCADE"))
-            db.commit()
+        # Fork the conversion workers while this process holds no database connection, so
+        # none of them inherits (and on exit tears down) a socket of the engine's pool
+        workers = workers or os.cpu_count() or 1
+        self.engine.dispose()
+        pool = _conversion_pool(workers)
+
+        # Clear and reload in one transaction on one connection, so a dropped download or
+        # corrupt payload rolls back to the previous cards (and their indexes)
+        conn = self.engine.raw_connection()
+
+        # Import new data - the payload may or may not actually be gzipped, so check its magic bytes
+        f = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == GZIP_MAGIC else raw
 
-        # Import new data - check if file is actually gzipped
-        try:
-            # Try to open as gzipped file first
-            f = gzip.open(file_path, 'rt', encoding='utf-8')
-            f.read(1)  # Try to read one byte to test if it's gzipped
-            f.seek(0)  # Reset to beginning
-        except (OSError, gzip.BadGzipFile):
-            # If not gzipped, open as regular file
-            f = open(file_path, 'r', encoding='utf-8')
-        
         try:
-            # Read the entire file as a single JSON array
-            data = json.load(f)
-            if not isinstance(data, list):
-                raise ValueError("Expected JSON array")
-            
-            for line_num, card_data in enumerate(data, 1):
-                try:
-                    card = self.process_card_data(card_data)
+            with conn.cursor() as cur:
+                # Clear existing data
+                print("Clearing existing card data (card tables are locked until the import commits)...")
+                cur.execute("TRUNCATE TABLE scryfall_cards CASCADE")
 
-                    if card:
-                        batch.append(card)
+                # Build indexes only once the table is filled (see create_indexes)
+                self.drop_indexes(cur)
 
-                    # Process batch
-                    if len(batch) >= batch_size:
-                        self._insert_batch(batch)
-                        imported_count += len(batch)
-                        batch = []
+                # Stream the top-level JSON array one card at a time instead of loading it whole;
+                # use_float keeps numbers as floats (not Decimal) so the raw card stays JSON serializable
+                cards = ijson.items(f, 'item', use_float=True, buf_size=READ_BUFFER_SIZE)
 
-                        if imported_count % 10000 == 0:
-                            print(f"Imported {imported_count} cards...")
+                for lines in _convert_batches(cards, batch_size, pool, workers):
+                    if not lines:
+                        continue
 
-                except Exception as e:
-                    print(f"Error on line {line_num}: {e}")
-                    continue
+                    self._insert_batch(cur, lines)
+                    imported_count += len(lines)
 
-            # Process remaining batch
-            if batch:
-                self._insert_batch(batch)
-                imported_count += len(batch)
+                    if imported_count % 10000 == 0:
+                        print(f"Imported {imported_count} cards...")
 
+            conn.commit()
             print(f"Successfully imported {imported_count} cards")
             return imported_count
+        except Exception:
+            conn.rollback()
+            print("Import failed; kept the existing card data")
+            raise
         finally:
             f.close()
+            conn.close()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
 
-    def _insert_batch(self, cards):
-        """Insert a batch of cards into the database"""
-        with self.SessionLocal() as db:
-            try:
-                db.add_all(cards)
-                db.commit()
-            except Exception as e:
-                db.rollback()
-                print(f"Error inserting batch: {e}")
-                raise
-
-    def create_indexes(self):
-        """Create database indexes for performance"""
-        print("Creating database indexes...")
+    def _insert_batch(self, cur, lines: List[str]):
+        """Load a batch of COPY lines, bypassing per-row INSERT processing"""
+        cur.copy_expert(COPY_CARDS_SQL, io.StringIO("".join(lines)))
 
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_cards_name_trgm ON scryfall_cards USING gin (name gin_trgm_ops)",
-            "CREATE INDEX IF NOT EXISTS idx_cards_oracle_text_gin ON scryfall_cards USING gin (to_tsvector('english', coalesce(oracle_text,'')))",
-            "CREATE INDEX IF NOT EXISTS idx_cards_color_identity ON scryfall_cards USING gin (color_identity)",
-            "CREATE INDEX IF NOT EXISTS idx_cards_type_line ON scryfall_cards USING gin (to_tsvector('english', coalesce(type_line,'')))",
-            "CREATE INDEX IF NOT EXISTS idx_cards_legalities ON scryfall_cards USING gin ((legalities::jsonb) jsonb_ops)",
-        ]
+    def has_cards(self) -> bool:
+        """Check whether the card table holds any data"""
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT EXISTS (SELECT 1 FROM scryfall_cards)")).scalar()
+
+    def drop_indexes(self, cur):
+        """Drop the secondary indexes so the bulk load does not maintain them per row
+
+        Runs on the import's cursor, so the drops roll back with a failed import.
+        """
+        print("Dropping database indexes...")
+
+        for index_name in CARD_INDEXES:
+            cur.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    def create_indexes(self) -> bool:
+        """Create database indexes for performance; returns False when any index failed"""
+        print("Creating database indexes...")
+        created = True
 
         with self.engine.connect() as conn:
-            for index_sql in indexes:
+            # Let the index builds use parallel workers, and sort in more memory when configured
+            if settings.IMPORT_MAINTENANCE_WORK_MEM:
+                conn.execute(text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                             {"value": settings.IMPORT_MAINTENANCE_WORK_MEM})
+            conn.execute(text("SET max_parallel_maintenance_workers = 4"))
+            conn.commit()
+            for index_sql in CARD_INDEXES.values():
                 try:
                     print(f"Creating index: {index_sql[:50]}...")
                     conn.execute(text(index_sql))
                     conn.commit()
                 except Exception as e:
+                    conn.rollback()
+                    created = False
                     print(f"Error creating index: {e}")
+        return created
 
 def main():
     """Main import function"""
@@ -238,23 +414,36 @@ def main():
         print(f"Description: {default_cards_info.description}")
         print(f"Updated: {default_cards_info.updated_at}")
 
-        # Download data
-        data_dir = Path(__file__).parent / "data"
-        data_dir.mkdir(exist_ok=True)
-
-        download_path = data_dir / "default_cards.json.gz"
-        importer.download_bulk_data(default_cards_info, download_path)
-
-        # Import data
-        imported_count = importer.import_cards(download_path)
-
-        # Create indexes
-        importer.create_indexes()
+        # Skip the download entirely when this bulk file was already imported
+        cache_path = Path(__file__).parent / "data" / ".cache.json"
+        cache = _load_import_cache(cache_path)
+        has_cards = importer.has_cards()
+        if (has_cards
+                and cache.get("download_uri") == default_cards_info.download_uri
+                and cache.get("updated_at") == default_cards_info.updated_at):
+            print(f"Bulk data already imported; delete {cache_path} to force a reimport.")
+            # Still make sure every index exists; each one is IF NOT EXISTS, so this is cheap
+            return 0 if importer.create_indexes() else 1
+
+        # Stream the download straight into the database
+        imported_count, etag = importer.import_cards_from_url(
+            default_cards_info,
+            etag=cache.get("etag") if has_cards else None
+        )
+
+        # Create indexes on every path, including an unchanged (304) download; only record
+        # the import once they all exist so a failed index build is retried next run
+        if not importer.create_indexes():
+            print("Import finished but some indexes could not be created; not caching this import.")
+            return 1
 
-        # Cleanup
-        # download_path.unlink()  # Commented out to examine file format
+        _save_import_cache(cache_path, {
+            "download_uri": default_cards_info.download_uri,
+            "updated_at": default_cards_info.updated_at,
+            "etag": etag,
+        })
 
-        print(f"Import completed successfully! Imported {imported_count} cards.")
+        print(f"Import completed successfully! Imported {imported_count or 0} cards.")
         return 0
 
     except Exception as e: